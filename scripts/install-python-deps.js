@@ -13,7 +13,7 @@ const isMac = platform === 'darwin';
 const isLinux = platform === 'linux';
 
 // Core packages needed on all platforms
-const corePackages = ['markdown', 'weasyprint', 'pygments'];
+const corePackages = ['markdown', 'weasyprint', 'pygments', 'pypdf'];
 
 // Platform-specific packages
 const windowsPackages = ['pywin32'];
@@ -4,8 +4,9 @@
 import * as vscode from 'vscode';
 import * as path from 'path';
 import * as fs from 'fs';
-import { spawn, execSync } from 'child_process';
+import { execSync } from 'child_process';
 import { cleanTempPrintFolder } from './utils/cleanTemp';
+import { sendPrintJob, stopPrintServer, PrintJob } from './utils/printServer';
 
 // Global types.
 type vsExt = vscode.ExtensionContext
@@ -160,33 +161,17 @@ export function activate(context: vscode.ExtensionContext) {
           if (message.command === 'debug') {
             console.log('[Webview Debug]:', message.data);
           } else if (message.command === 'getPrinters') {
-            // Get list of available printers from Python script
+            // Get list of available printers from the Python print server
             const pythonEngine = path.join(context.extensionPath, 'src', 'printMD.py');
             const pythonCmd = getPythonCommand();
-            
-            const command = `${pythonCmd} "${pythonEngine}" --list-printers`;
-            const pyProc = spawn(command, [], { shell: true });
-
-            let printerOutput = '';
-            let errorOutput = '';
-
-            pyProc.stdout.on('data', (data) => {
-              printerOutput += data.toString();
-            });
 
-            pyProc.stderr.on('data', (data) => {
-              errorOutput += data.toString();
-            });
-
-            pyProc.on('close', (code) => {
-              if (code === 0) {
-                const printers = printerOutput.trim().split('\n').filter(p => p.trim());
-                panel.webview.postMessage({ command: 'printerList', printers: printers });
-              } else {
-                vscode.window.showErrorMessage(`Failed to get printer list: ${errorOutput}`);
-                panel.webview.postMessage({ command: 'printerList', printers: [] });
-              }
-            });
+            const result = await sendPrintJob(pythonCmd, pythonEngine, { list_printers: true });
+            if (result.code === 0) {
+              panel.webview.postMessage({ command: 'printerList', printers: result.printers || [] });
+            } else {
+              vscode.window.showErrorMessage(`Failed to get printer list: ${result.error || result.output}`);
+              panel.webview.postMessage({ command: 'printerList', printers: [] });
+            }
           } else if (message.command === 'setPageRange') {
             // Store the selected page range settings
             if (message.data) {
@@ -246,89 +231,67 @@ export function activate(context: vscode.ExtensionContext) {
               const pythonEngine = path.join(context.extensionPath, 'src', 'printMD.py');
               const pythonCmd = getPythonCommand();
 
-              const command = `${pythonCmd} "${pythonEngine}" --html "${htmlPath}" --pdf "${saveUri.fsPath}" --base-url "${mdFileDir}"`;
-              const pyProc = spawn(command, [], { shell: true });
-
-              let errorOutput = '';
-
-              pyProc.stdout.on('data', (data) => {
-                console.log(`stdout: ${data.toString()}`);
+              const result = await sendPrintJob(pythonCmd, pythonEngine, {
+                html: htmlPath,
+                pdf: saveUri.fsPath,
+                base_url: mdFileDir
               });
+              console.log(`stdout: ${result.output || ''}`);
 
-              pyProc.stderr.on('data', (data) => {
-                errorOutput += data.toString();
-              });
-
-              pyProc.on('close', (code) => {
-                panel.dispose();
-                // Clean up temporary HTML file
-                setTimeout(() => {
-                  try {
-                    if (fs.existsSync(htmlPath)) fs.unlinkSync(htmlPath);
-                  } catch (cleanupError) {
-                    console.error('Cleanup error:', cleanupError);
-                  }
-                }, 1000);
-                
-                if (code === 0) {
-                  vscode.window.showInformationMessage(`PDF saved successfully to ${path.basename(saveUri.fsPath)}`);
-                } else {
-                  vscode.window.showErrorMessage(`PDF save failed (exit code ${code})\n${errorOutput}`);
+              panel.dispose();
+              // Clean up temporary HTML file
+              setTimeout(() => {
+                try {
+                  if (fs.existsSync(htmlPath)) fs.unlinkSync(htmlPath);
+                } catch (cleanupError) {
+                  console.error('Cleanup error:', cleanupError);
                 }
-              });
+              }, 1000);
+
+              if (result.code === 0) {
+                vscode.window.showInformationMessage(`PDF saved successfully to ${path.basename(saveUri.fsPath)}`);
+              } else {
+                vscode.window.showErrorMessage(`PDF save failed (exit code ${result.code})\n${result.error || result.output}`);
+              }
               return;
             }
 
             // Regular printing to physical printer
             vscode.window.showInformationMessage(`Printing ${path.basename(mdDocument.fileName)}...`);
 
-            // Convert HTML to PDF and print using Python script
+            // Convert HTML to PDF and print using the Python print server
             const pythonEngine = path.join(context.extensionPath, 'src', 'printMD.py');
             const pythonCmd = getPythonCommand();
 
-            // Build command with proper quoting
-            let command = `${pythonCmd} "${pythonEngine}" --html "${htmlPath}" --pdf "${pdfPath}" --base-url "${mdFileDir}"`;
+            const job: PrintJob = { html: htmlPath, pdf: pdfPath, base_url: mdFileDir };
             if (printerToUse) {
-              command += ` --printer "${printerToUse}"`;
+              job.printer = printerToUse;
             }
             // Add page range if specified
             const pageRange = message.data?.pageRange || pageRangeSettings;
             if (pageRange.mode !== 'all' && pageRange.value) {
-              command += ` --pages "${pageRange.value}"`;
+              job.pages = pageRange.value;
             }
 
-            const pyProc = spawn(command, [], { shell: true });
-
-            let errorOutput = '';
-
-            pyProc.stdout.on('data', (data) => {
-              const output = data.toString();
-              console.log(`stdout: ${output}`);
-            });
-
-            pyProc.stderr.on('data', (data) => {
-              errorOutput += data.toString();
-              console.error(`stderr: ${data}`);
-            });
+            const result = await sendPrintJob(pythonCmd, pythonEngine, job);
+            console.log(`stdout: ${result.output || ''}`);
 
-            pyProc.on('close', (code) => {
-              panel.dispose();
-              // Clean up temporary files after a delay to ensure printing is complete
-              setTimeout(() => {
-                try {
-                  if (fs.existsSync(htmlPath)) fs.unlinkSync(htmlPath);
-                  if (fs.existsSync(pdfPath)) fs.unlinkSync(pdfPath);
-                } catch (cleanupError) {
-                  console.error('Cleanup error:', cleanupError);
-                }
-              }, 15000);
-              
-              if (code === 0) {
-                vscode.window.showInformationMessage(`Print job completed for ${path.basename(mdDocument.fileName)}`);
-              } else {
-                vscode.window.showErrorMessage(`Printing failed (exit code ${code})\n${errorOutput}`);
+            panel.dispose();
+            // Clean up temporary files after a delay to ensure printing is complete
+            setTimeout(() => {
+              try {
+                if (fs.existsSync(htmlPath)) fs.unlinkSync(htmlPath);
+                if (fs.existsSync(pdfPath)) fs.unlinkSync(pdfPath);
+              } catch (cleanupError) {
+                console.error('Cleanup error:', cleanupError);
               }
-            });
+            }, 15000);
+
+            if (result.code === 0) {
+              vscode.window.showInformationMessage(`Print job completed for ${path.basename(mdDocument.fileName)}`);
+            } else {
+              vscode.window.showErrorMessage(`Printing failed (exit code ${result.code})\n${result.error || result.output}`);
+            }
           } else if (message.command === 'cancel') {
             panel.dispose();
             // Clean up temporary files on cancel
@@ -427,4 +390,6 @@ function embedImagesInHtml(html: string, baseDir: string): string {
   return result;
 }
 
-export function deactivate() {}
+export function deactivate() {
+  stopPrintServer();
+}
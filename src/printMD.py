@@ -10,7 +10,7 @@ Usage:
 
 What it does:
   - Converts Markdown to HTML with a simple print-friendly CSS (GitHub-like).
-  - Attempts to render the HTML to a Letter-sized PDF using WeasyPrint.
+  - Attempts to render the HTML to a Letter-sized PDF using WeasyPrint (or headless Chromium / LibreOffice, --backend).
   - Sends the PDF to the default (or named) printer.
   - Cross-platform fallbacks:
     - Windows: try pywin32 ShellExecute, else os.startfile(..., "print"), else rundll32 hack.
@@ -19,7 +19,7 @@ What it does:
   - Cleans up temporary files.
 
 Dependencies (recommended):
-    pip install markdown weasyprint pygments
+    pip install markdown weasyprint pygments pypdf   (or: python printMD.py --install-deps)
 
 Optional (Windows printing reliability):
     pip install pywin32
@@ -31,6 +31,7 @@ the script will fall back to saving HTML for manual printing.
 from __future__ import annotations
 import argparse
 import shutil
+import stat
 import sys
 import tempfile
 import time
@@ -39,88 +40,488 @@ import subprocess
 from pathlib import Path
 import html
 import importlib
+import functools
+import hashlib
+import io
+import json
+import re
+import contextlib
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Rendered PDFs kept in the cache before the least recently used are evicted
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Same for syntax highlighted markdown bodies (--highlight)
+HIGHLIGHT_CACHE_MAX_BYTES = 20 * 1024 * 1024
 
 # Debug variables - DO NOT DELETE
 debug_print_md = 0 # 0 (default) 1 does not print
 
-# Try optional packages
-_have_weasy = True
-_have_pywin32 = True
-_have_pygments = True
-_have_pypdf = True
+# Optional packages are imported on first use (see load_optional) so --help, --list-printers
+# and the HTML fallback don't pay for them. Maps package name -> import succeeded.
+_have_optional: dict[str, bool] = {}
+HTML = None  # type: ignore
+CSS = None  # type: ignore
 PdfReader = None  # type: ignore
 PdfWriter = None  # type: ignore
 PageRange = None  # type: ignore
+win32api = None  # type: ignore
+win32print = None  # type: ignore
+# markdown is required for everything except --install-deps, which main() checks
 try:
   import markdown
 except Exception:
-  print("ERROR: Missing Python package 'markdown'. Install with: pip install markdown")
-  sys.exit(2)
+  markdown = None  # type: ignore
 
-try:
-  from weasyprint import HTML, CSS  # type: ignore
-except Exception:
-  _have_weasy = False
+# Installed by --install-deps; pywin32 is added on Windows
+PYTHON_PACKAGES = ['markdown', 'weasyprint', 'pygments', 'pypdf']
 
-try:
-  import pygments  # noqa: F401
-except Exception:
-  _have_pygments = False
-
-try:
-  from pypdf import PdfReader as _PdfReader, PdfWriter as _PdfWriter, PageRange as _PageRange  # type: ignore
-  PdfReader = _PdfReader
-  PdfWriter = _PdfWriter
-  PageRange = _PageRange
-except Exception:
-  _have_pypdf = False
+def load_optional(package: str) -> bool:
+  """
+  Import an optional package the first time it is needed and remember the result.
+  package: 'weasyprint' (HTML, CSS), 'pypdf' (PdfReader, PdfWriter, PageRange),
+    'pywin32' (win32api, win32print) or 'pygments'
+  Returns True if the package is available.
+  """
+  global HTML, CSS, PdfReader, PdfWriter, PageRange, win32api, win32print
+  if package not in _have_optional:
+    try:
+      if package == 'weasyprint':
+        from weasyprint import HTML, CSS  # type: ignore
+      elif package == 'pypdf':
+        from pypdf import PdfReader, PdfWriter, PageRange  # type: ignore
+      elif package == 'pywin32':
+        import win32api    # type: ignore
+        import win32print  # type: ignore
+      else:
+        importlib.import_module(package)
+      _have_optional[package] = True
+    except Exception:
+      _have_optional[package] = False
+  return _have_optional[package]
 
-try:
-  import win32api    # type: ignore
-  import win32print  # type: ignore
-except Exception:
-  _have_pywin32 = False
+def forget_missing_optional() -> None:
+  """
+  Let load_optional retry packages that failed to import, e.g. once per --serve job, so a
+  package installed while the worker is running is picked up without restarting it.
+  """
+  for package in [name for name, available in _have_optional.items() if not available]:
+    del _have_optional[package]
+  importlib.invalidate_caches()
 
+# Default extensions; toc and nl2br walk every node for nothing print output uses (add them back with --md-ext)
 MARKDOWN_EXTS = [
   'fenced_code',
-  'codehilite',
   'tables',
-  'toc',
-  'nl2br',
   'sane_lists',
   'attr_list',
 ]
 
-def md_to_html(md_text: str, title: str = "Document") -> str:
-  md = markdown.Markdown(extensions=MARKDOWN_EXTS, output_format='html5')
-  body = md.convert(md_text)
-  
-  # Get the path to the HTML template
-  script_dir = Path(__file__).parent
-  template_path = script_dir / 'views' / 'mdToHtml.htm'
-  
-  # Read the template file
+# Print link targets after the link text; opt-in because every link gets a generated-content box to lay out
+PRINT_CSS_LINK_URLS = 'a[href]:after { content: " (" attr(href) ")"; font-size: 85%; color: #444; }'
+
+# Syntax highlighting runs Pygments on every code block, so it is only added on request (--highlight)
+HIGHLIGHT_EXT = 'codehilite'
+
+# Inline Pygments styles; the print CSS has no codehilite rules for class-based output
+MARKDOWN_EXT_CONFIGS = {
+  'codehilite': {'noclasses': True},
+}
+
+def get_cache_dir() -> Path:
+  """Per-user cache directory for printMD."""
+  if sys.platform.startswith('win'):
+    base = os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()
+  else:
+    base = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / '.cache')
+  return Path(base) / 'printmd'
+
+def write_cache_entry(cache_path: Path, source: str | bytes, max_bytes: int) -> None:
+  """
+  Store a cache entry (a file path to copy, or the bytes) at cache_path, then evict the least
+  recently used entries with the same suffix until the directory is under max_bytes.
+  """
+  cache_dir = cache_path.parent
+  cache_dir.mkdir(parents=True, exist_ok=True)
+  # Write under a temporary name so a concurrent reader never sees a partial entry
+  partial_path = cache_dir / f"{cache_path.stem}.{os.getpid()}.partial"
+  if isinstance(source, bytes):
+    partial_path.write_bytes(source)
+  else:
+    shutil.copyfile(source, partial_path)
+  os.replace(partial_path, cache_path)
+
+  entries = []
+  for entry in cache_dir.glob(f"*{cache_path.suffix}"):
+    entry_stat = entry.stat()
+    entries.append((entry_stat.st_mtime, entry_stat.st_size, entry))
+  total = sum(size for _, size, _ in entries)
+  for _, size, entry in sorted(entries, key=lambda item: item[0]):
+    if total <= max_bytes:
+      break
+    entry.unlink()
+    total -= size
+
+def parse_md_ext(change: str) -> tuple[str, str]:
+  """Split an --md-ext value ('add:NAME' or 'remove:NAME'; a bare NAME means add) into (action, name)."""
+  action, sep, name = change.partition(':')
+  if not sep:
+    action, name = 'add', change
+  if action not in ('add', 'remove') or not name:
+    raise ValueError(f"Invalid --md-ext value '{change}' (expected add:NAME or remove:NAME)")
+  return action, name
+
+def md_ext_option(value: str) -> str:
+  """argparse type for --md-ext: validate the value, keep it as given."""
+  try:
+    parse_md_ext(value)
+  except ValueError as e:
+    raise argparse.ArgumentTypeError(str(e))
+  return value
+
+def get_markdown_extensions(highlight: bool = False, md_ext: list[str] | None = None) -> tuple[str, ...]:
+  """
+  Return the extension set for a conversion; codehilite is added only when Pygments is installed.
+  md_ext holds --md-ext changes ('add:toc', 'remove:tables', ...) applied in order to the defaults.
+  """
+  extensions = list(MARKDOWN_EXTS)
+  if highlight and load_optional('pygments'):
+    extensions.append(HIGHLIGHT_EXT)
+  for change in md_ext or ():
+    action, name = parse_md_ext(change)
+    if action == 'add' and name not in extensions:
+      extensions.append(name)
+    elif action == 'remove' and name in extensions:
+      extensions.remove(name)
+  return tuple(extensions)
+
+@functools.lru_cache(maxsize=None)
+def get_markdown_converter(extensions: tuple[str, ...]) -> markdown.Markdown:
+  """
+  Build the Markdown converter once per extension set.
+  Loading and registering extensions is the main setup cost, so the instance is reused and reset per document.
+  Raises ValueError if an extension (e.g. from --md-ext) can't be loaded.
+  """
+  configs = {ext: MARKDOWN_EXT_CONFIGS[ext] for ext in extensions if ext in MARKDOWN_EXT_CONFIGS}
+  try:
+    return markdown.Markdown(extensions=list(extensions), extension_configs=configs, output_format='html5')
+  except (ImportError, AttributeError, TypeError) as e:
+    raise ValueError(f"Unable to load markdown extension ({e})")
+
+def convert_markdown(md_text: str, extensions: tuple[str, ...]) -> str:
+  """
+  Convert markdown to an HTML body.
+  Highlighted output is cached on disk keyed by a hash of the source, so printing the same
+  document again skips Pygments entirely. The cache is capped at HIGHLIGHT_CACHE_MAX_BYTES.
+  """
+  if HIGHLIGHT_EXT not in extensions:
+    return get_markdown_converter(extensions).reset().convert(md_text)
+
+  pygments_version = importlib.import_module('pygments').__version__ if load_optional('pygments') else ''
+  key_source = '\0'.join((
+    markdown.__version__,
+    pygments_version,
+    json.dumps(MARKDOWN_EXT_CONFIGS, sort_keys=True),
+    *extensions,
+    md_text,
+  ))
+  key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+  cache_path = get_cache_dir() / 'highlight' / f"{key}.html"
+  try:
+    body = cache_path.read_text(encoding='utf-8')
+    os.utime(cache_path)
+    return body
+  except OSError:
+    pass
+
+  body = get_markdown_converter(extensions).reset().convert(md_text)
+  try:
+    write_cache_entry(cache_path, body.encode('utf-8'), HIGHLIGHT_CACHE_MAX_BYTES)
+  except OSError as e:
+    print(f"Warning: Unable to cache highlighted markdown ({e})")
+  return body
+
+# Page setup for pre-rendered HTML (markdown input carries its own @page rule in mdToHtml.css)
+PAGE_CSS = '@page { size: Letter; margin: 1in }'
+
+@functools.lru_cache(maxsize=None)
+def load_html_template() -> tuple[str, ...]:
+  """
+  Read the mdToHtml.htm template once and split it around its placeholders.
+  Returns the text before html_escape_title, between it and print_css_style, between that
+  and markdown_body, and after markdown_body. Values are concatenated between the pieces,
+  so a title or body that contains a placeholder name is never substituted again.
+  """
+  template_path = Path(__file__).parent / 'views' / 'mdToHtml.htm'
   with open(template_path, 'r', encoding='utf-8') as f:
-    html_doc = f.read()
-  
-  # Replace placeholders
-  html_doc = html_doc.replace('markdown_body', body)
-  html_doc = html_doc.replace('html_escape_title', html.escape(title))
-  
-  return html_doc
+    template = f.read()
+  before_title, rest = template.split('html_escape_title', 1)
+  before_style, rest = rest.split('print_css_style', 1)
+  before_body, after_body = rest.split('markdown_body', 1)
+  return before_title, before_style, before_body, after_body
+
+@functools.lru_cache(maxsize=None)
+def load_print_css() -> str:
+  """Read the print stylesheet used for markdown input (views/mdToHtml.css) once."""
+  css_path = Path(__file__).parent / 'views' / 'mdToHtml.css'
+  return css_path.read_text(encoding='utf-8')
 
-def render_pdf(html_str: str, out_pdf: str, base_url: str | None = None) -> None:
-  if not _have_weasy:
+def md_to_html(
+  md_text: str,
+  title: str = "Document",
+  inline_css: bool = True,
+  highlight: bool = False,
+  md_ext: list[str] | None = None
+) -> str:
+  """
+  Convert markdown to a complete HTML document.
+  With inline_css=False the <style> block is left out; render_pdf then supplies the
+  print stylesheet pre-parsed so WeasyPrint does not parse it again for every document.
+  With highlight=True fenced code is syntax highlighted via Pygments (codehilite).
+  md_ext adds or removes markdown extensions (see get_markdown_extensions).
+  """
+  body = convert_markdown(md_text, get_markdown_extensions(highlight, md_ext))
+
+  # Fill the cached template by concatenation, so no value is ever scanned for placeholders
+  before_title, before_style, before_body, after_body = load_html_template()
+  style = f"<style>\n{load_print_css()}</style>" if inline_css else ''
+  return before_title + html.escape(title) + before_style + style + before_body + body + after_body
+
+@functools.lru_cache(maxsize=None)
+def get_weasy_stylesheets(include_print_css: bool = False, print_link_urls: bool = False) -> tuple:
+  """
+  Build WeasyPrint CSS objects once per combination and reuse them for every render.
+  include_print_css: apply views/mdToHtml.css (markdown input rendered with inline_css=False)
+  print_link_urls: append PRINT_CSS_LINK_URLS
+  """
+  stylesheets = [CSS(string=load_print_css() if include_print_css else PAGE_CSS)]
+  if print_link_urls:
+    stylesheets.append(CSS(string=PRINT_CSS_LINK_URLS))
+  return tuple(stylesheets)
+
+# HTML -> PDF renderers selectable with --backend; the first is the default
+PDF_BACKENDS = ['weasyprint', 'chromium-headless', 'libreoffice']
+
+# Executables tried for the external backends, in order
+BACKEND_COMMANDS = {
+  'chromium-headless': [
+    'chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable', 'chrome', 'msedge',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+  ],
+  'libreoffice': ['soffice', 'libreoffice'],
+}
+
+# Seconds an external backend may take before the render is abandoned (a hung browser would block --serve)
+EXTERNAL_RENDER_TIMEOUT = 120
+
+def find_backend_command(backend: str) -> str | None:
+  """Return the executable for an external PDF backend, or None if it isn't installed."""
+  for command in BACKEND_COMMANDS.get(backend, []):
+    found = shutil.which(command)
+    if found:
+      return found
+  return None
+
+def have_pdf_backend(backend: str) -> bool:
+  if backend == 'weasyprint':
+    return load_optional('weasyprint')
+  return find_backend_command(backend) is not None
+
+def render_pdf(
+  html_str: str,
+  out_pdf: str | None,
+  base_url: str | None = None,
+  print_link_urls: bool = False,
+  include_print_css: bool = False,
+  backend: str = 'weasyprint'
+) -> bytes | None:
+  """
+  Render HTML to PDF with WeasyPrint (or an external backend, see render_pdf_external).
+  Writes to out_pdf, or returns the PDF bytes when out_pdf is None.
+  """
+  if backend != 'weasyprint':
+    return render_pdf_external(backend, html_str, out_pdf, base_url, print_link_urls, include_print_css)
+  if not load_optional('weasyprint'):
     raise RuntimeError("WeasyPrint not available")
   # Ensure Letter page size with CSS override; base_url resolves relative resources (images, etc.)
-  HTML(string=html_str, base_url=base_url).write_pdf(out_pdf, stylesheets=[CSS(string='@page { size: Letter; margin: 1in }')])
+  stylesheets = get_weasy_stylesheets(include_print_css, print_link_urls)
+  return HTML(string=html_str, base_url=base_url).write_pdf(out_pdf, stylesheets=list(stylesheets))
+
+def add_html_head(html_str: str, base_url: str | None = None, extra_css: str = '') -> str:
+  """Insert a <base> for base_url and a <style> block with extra_css into the document head."""
+  head = ''
+  if base_url:
+    head += f'<base href="{html.escape(Path(base_url).resolve().as_uri())}/">'
+  if extra_css:
+    head += f"<style>\n{extra_css}\n</style>"
+  if not head:
+    return html_str
+  return html_str.replace('</head>', head + '</head>', 1) if '</head>' in html_str else head + html_str
 
-def print_or_save_pdf(os_name: str, pdf_path: str, command_func) -> None:
+def render_pdf_external(
+  backend: str,
+  html_str: str,
+  out_pdf: str | None,
+  base_url: str | None = None,
+  print_link_urls: bool = False,
+  include_print_css: bool = False
+) -> bytes | None:
+  """
+  Render HTML to PDF with headless Chromium or LibreOffice instead of WeasyPrint.
+  Chromium lays out large documents with complex CSS much faster than WeasyPrint.
+  Both tools convert files, so the HTML is written to a scratch directory with a <base>
+  for base_url and any extra CSS inlined.
+  """
+  command = find_backend_command(backend)
+  if not command:
+    raise RuntimeError(f"PDF backend '{backend}' not available")
+
+  # Stylesheets WeasyPrint would get through stylesheets= go inline here
+  extra_css = (load_print_css() if include_print_css else PAGE_CSS) + (PRINT_CSS_LINK_URLS if print_link_urls else '')
+  html_str = add_html_head(html_str, base_url, extra_css)
+
+  work_dir = Path(tempfile.mkdtemp(prefix="printmd_"))
+  try:
+    html_path = work_dir / 'document.html'
+    html_path.write_text(html_str, encoding='utf-8')
+    rendered = work_dir / 'document.pdf'
+    if backend == 'chromium-headless':
+      cmd = [
+        command, '--headless', '--disable-gpu', '--no-pdf-header-footer',
+        f"--print-to-pdf={rendered}", html_path.as_uri(),
+      ]
+    else:
+      # LibreOffice names the output after the input file inside --outdir. A private profile keeps
+      # --convert-to from handing the job to an already running LibreOffice, which ignores it.
+      profile_uri = (work_dir / 'profile').as_uri()
+      cmd = [
+        command, f"-env:UserInstallation={profile_uri}", '--headless',
+        '--convert-to', 'pdf:writer_web_pdf_Export', '--outdir', str(work_dir), str(html_path),
+      ]
+    print("Running:", " ".join(cmd))
+    try:
+      subprocess.run(cmd, check=True, capture_output=True, timeout=EXTERNAL_RENDER_TIMEOUT)
+    except subprocess.TimeoutExpired:
+      raise RuntimeError(f"{backend} did not finish within {EXTERNAL_RENDER_TIMEOUT}s")
+    if not rendered.exists():
+      raise RuntimeError(f"{backend} did not produce a PDF")
+    if out_pdf is None:
+      return rendered.read_bytes()
+    shutil.copyfile(rendered, out_pdf)
+    return None
+  finally:
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+def warm_up_pdf_backend(backend: str) -> None:
+  """
+  Render a throwaway page so Fontconfig and Pango build their font caches now instead of
+  during the first real print. Only WeasyPrint keeps these caches in-process.
+  """
+  if backend != 'weasyprint' or not load_optional('weasyprint'):
+    return
+  try:
+    warmup_html = '<html><body><h1>warmup</h1><p>warmup <code>warmup</code></p></body></html>'
+    HTML(string=warmup_html).write_pdf(stylesheets=list(get_weasy_stylesheets(include_print_css=True)))
+  except Exception as e:
+    print(f"Warning: PDF backend warm-up failed ({e})")
+
+@functools.lru_cache(maxsize=None)
+def get_engine_version() -> str:
+  """
+  Version of this engine for the PDF cache key: the extension version from package.json, plus
+  printMD.py's modification time so a changed engine never reuses PDFs from the old one.
+  """
+  engine_path = Path(__file__)
+  try:
+    package = json.loads((engine_path.parent.parent / 'package.json').read_text(encoding='utf-8'))
+    version = str(package.get('version', ''))
+  except (OSError, ValueError):
+    version = ''
+  return f"{version}:{engine_path.stat().st_mtime_ns}"
+
+def get_backend_version(backend: str) -> str:
+  """Identify the renderer for the PDF cache key: WeasyPrint's version, or the external executable."""
+  if backend == 'weasyprint':
+    return importlib.import_module('weasyprint').__version__ if load_optional('weasyprint') else ''
+  return find_backend_command(backend) or ''
+
+# src="..." attributes; local images are part of the cached PDF, so their mtimes go into its key
+RESOURCE_SRC_RE = re.compile(r"""\bsrc\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+def local_resource_stamps(html_str: str, base_url: str | None = None) -> list[str]:
+  """List 'path:mtime:size' for every local file a src= attribute refers to (missing files included)."""
+  stamps = []
+  for src in RESOURCE_SRC_RE.findall(html_str):
+    url = urllib.parse.urlparse(html.unescape(src))
+    if url.scheme == 'file':
+      path = Path(urllib.request.url2pathname(url.path))
+    elif not url.scheme and base_url:
+      path = Path(base_url) / urllib.parse.unquote(url.path)
+    else:
+      # http(s):, data: and the like (or relative paths with nothing to resolve them against)
+      continue
+    try:
+      resource_stat = path.stat()
+      stamps.append(f"{path}:{resource_stat.st_mtime_ns}:{resource_stat.st_size}")
+    except OSError:
+      stamps.append(f"{path}:missing")
+  return stamps
+
+def pdf_cache_key(
+  html_str: str,
+  base_url: str | None = None,
+  print_link_urls: bool = False,
+  include_print_css: bool = False,
+  backend: str = 'weasyprint'
+) -> str:
+  """
+  Hash everything that affects render_pdf output (same arguments as render_pdf), including
+  the engine and renderer versions and the modification times of local images.
+  """
+  digest = hashlib.blake2b(digest_size=20)
+  for part in (
+    get_engine_version(),
+    backend,
+    get_backend_version(backend),
+    html_str,
+    load_print_css() if include_print_css else PAGE_CSS,
+    PRINT_CSS_LINK_URLS if print_link_urls else '',
+    base_url or '',
+    *local_resource_stamps(html_str, base_url),
+  ):
+    digest.update(part.encode('utf-8'))
+    digest.update(b'\0')
+  return digest.hexdigest()
+
+def find_cached_pdf(key: str) -> Path | None:
+  """Return the cached PDF for key, marking it as recently used, or None on a miss."""
+  cache_path = get_cache_dir() / 'pdf' / f"{key}.pdf"
+  try:
+    os.utime(cache_path)
+    return cache_path
+  except OSError:
+    return None
+
+def store_cached_pdf(key: str, source: str | bytes) -> None:
+  """
+  Add a rendered PDF (path or bytes) to the cache, then evict least recently used
+  entries until the cache is under PDF_CACHE_MAX_BYTES.
+  """
+  try:
+    write_cache_entry(get_cache_dir() / 'pdf' / f"{key}.pdf", source, PDF_CACHE_MAX_BYTES)
+  except OSError as e:
+    print(f"Warning: Unable to update PDF cache ({e})")
+
+def print_or_save_pdf(os_name: str, pdf_path: str | None, command_func) -> bool:
   """
   Print or save PDF
   
   This function prints to office printer or skips printing if debug mode is disabled.
   In debug mode, it just prints the command instead of executing it.
+  pdf_path None means a PDF that only exists in memory, which is always printed.
+  Returns True if the print command was executed.
   """
   global debug_print_md
   
@@ -128,7 +529,7 @@ def print_or_save_pdf(os_name: str, pdf_path: str, command_func) -> None:
     # Normal mode - execute the command
     # Check if this is a temp file (will be deleted after printing)
     # Temp files include: system temp dirs, printmd_ folders, VS Code globalStorage, and print-output-* files
-    is_temp = (
+    is_temp = pdf_path is None or (
       'Temp' in pdf_path or 
       'temp' in pdf_path or 
       'printmd_' in pdf_path or
@@ -141,138 +542,256 @@ def print_or_save_pdf(os_name: str, pdf_path: str, command_func) -> None:
       # Execute the print command for temp files
       if callable(command_func):
         command_func()
+        return True
     else:
       # This is a saved PDF, just inform the user
       print(f"PDF Saved: {pdf_path}")
   else:
     # Debug mode - just print what would be executed
-    print(f"{os_name} - would execute print command for: {pdf_path}")
+    print(f"{os_name} - would execute print command for: {pdf_path or '(in-memory PDF)'}")
+  return False
 
-def print_pdf_windows(pdf_path: str, printer_name: str | None = None) -> None:
+def print_pdf_windows(pdf_path: str, printer_name: str | None = None, pdf_data: bytes | None = None) -> bool:
   """
   Print PDF on Windows. 
   
   This function calls the print_or_save_pdf functions specifying the os is Windows
+  The shell print verbs need a file, so pdf_data (if given) is written to pdf_path first.
+  Returns True if no print application was given the file (saved PDF or debug mode), so there
+  is nothing to wait for; False if one was and it may still be reading the file.
   """
+  if pdf_data is not None:
+    Path(pdf_path).write_bytes(pdf_data)
 
-  if _have_pywin32:
+  if load_optional('pywin32'):
     try:
       print("Printing via win32api.ShellExecute(..., 'print') ...")
-      print_or_save_pdf(
+      return not print_or_save_pdf(
         "windows",
         pdf_path,
         lambda: win32api.ShellExecute(0, "print", pdf_path, None, ".", 0)
       )
-      return
     except Exception as e:
       print("pywin32 ShellExecute failed:", e)
   # os.startfile fallback
   try:
     print("Printing via os.startfile(..., 'print') ...")
-    print_or_save_pdf(
+    return not print_or_save_pdf(
       "windows",
       pdf_path,
       lambda: os.startfile(pdf_path, "print")
     )
-    return
   except Exception as e:
     print("os.startfile print failed:", e)
   # last-ditch attempt using rundll32 (Windows)
   try:
     print("Attempting rundll32 ShellExec_RunDLL fallback ...")
-    print_or_save_pdf(
+    return not print_or_save_pdf(
       "windows",
       pdf_path,
-      lambda: subprocess.run(['rundll32', 'shell32.dll,ShellExec_RunDLL', pdf_path, 'print'], shell=True)
+      lambda: subprocess.run(['rundll32.exe', 'shell32.dll,ShellExec_RunDLL', pdf_path, 'print'], check=False)
     )
   except Exception as e:
     print("Final Windows fallback failed:", e)
     raise RuntimeError("Unable to send to printer on Windows")
 
-def print_pdf_unix(pdf_path: str, printer_name: str | None = None) -> None:
+def open_pdf_in_viewer(pdf_path: str) -> None:
+  """Open a PDF in the default viewer (macOS: open, Linux: xdg-open) for manual printing."""
+  if sys.platform == 'darwin':
+    subprocess.run(['open', pdf_path])
+  else:
+    # Linux - try xdg-open
+    subprocess.run(['xdg-open', pdf_path])
+
+def build_lp_command(lp_cmd: str, printer_name: str | None = None) -> list[str]:
+  """Start an lp/lpr command line, selecting printer_name if given (lp uses -d, lpr uses -P)."""
+  cmd = [lp_cmd]
+  if printer_name:
+    cmd += ['-d' if os.path.basename(lp_cmd) == 'lp' else '-P', printer_name]
+  return cmd
+
+def run_lp_command(cmd: list[str], data: bytes | None = None) -> None:
+  """Run lp/lpr (feeding data on stdin if given) and log the spooler job id."""
+  result = subprocess.run(cmd, input=data, stdout=subprocess.PIPE, check=True)
+  # lp reports "request id is <printer>-<n> (1 file(s))"; lpr prints nothing
+  job_id = LP_REQUEST_ID_RE.search(result.stdout.decode(errors='replace'))
+  if job_id:
+    print("Spooler job:", job_id.group(1))
+
+def print_pdf_unix(
+  pdf_path: str | None,
+  printer_name: str | None = None,
+  pdf_data: bytes | None = None,
+  get_pdf_path=None
+) -> bool:
   """
   Print PDF on UNIX. 
   
   This function calls the print_or_save_pdf functions specifying the os is UNIX.
+  When pdf_data is given it is piped to lp/lpr on stdin. Without a pdf_path, get_pdf_path()
+  supplies one only if the viewer fallback needs the PDF as a file.
+  Returns True once lp/lpr has returned: the spooler has its own copy by then, so the file can go.
+  Returns False if the PDF was opened in a viewer instead, which still needs the file.
   """
 
+  def fall_back_to_viewer() -> None:
+    print("Falling back to opening PDF in default viewer for manual printing...")
+    viewer_path = pdf_path or get_pdf_path()
+    if pdf_data is not None:
+      Path(viewer_path).write_bytes(pdf_data)
+    open_pdf_in_viewer(viewer_path)
+
   # Use lp or lpr if present
   lp_cmd = shutil.which('lp') or shutil.which('lpr')
   if not lp_cmd:
-    # No printer command available, open in browser as fallback
-    print("Neither 'lp' nor 'lpr' found. Opening PDF in default viewer for manual printing...")
-    if sys.platform == 'darwin':
-      subprocess.run(['open', pdf_path])
-    else:
-      # Linux - try xdg-open
-      subprocess.run(['xdg-open', pdf_path])
-    return
-  
-  cmd = [lp_cmd]
-  if printer_name:
-    # lp uses -d, lpr uses -P
-    if os.path.basename(lp_cmd) == 'lp':
-      cmd += ['-d', printer_name]
-    else:
-      cmd += ['-P', printer_name]
-  cmd += [pdf_path]
-  print("Running:", " ".join(cmd))
+    # No printer command available, open in viewer as fallback
+    print("Neither 'lp' nor 'lpr' found.")
+    fall_back_to_viewer()
+    return False
   
+  cmd = build_lp_command(lp_cmd, printer_name)
+  if pdf_data is None:
+    cmd += [pdf_path]
+  print("Running:", " ".join(cmd) + (" < (in-memory PDF)" if pdf_data is not None else ""))
+
   try:
-    print_or_save_pdf(
-      "unix",
-      pdf_path,
-      lambda: subprocess.run(cmd, check=True)
-    )
+    print_or_save_pdf("unix", pdf_path, lambda: run_lp_command(cmd, pdf_data))
+    return True
   except subprocess.CalledProcessError as e:
     # Print command failed, try opening in viewer
     print(f"Print command failed: {e}")
-    print("Falling back to opening PDF in default viewer for manual printing...")
-    if sys.platform == 'darwin':
-      subprocess.run(['open', pdf_path])
-    else:
-      # Linux - try xdg-open
-      subprocess.run(['xdg-open', pdf_path])
+    fall_back_to_viewer()
   except Exception as e:
     # Any other error, try opening in viewer
     print(f"Error during print: {e}")
-    print("Falling back to opening PDF in default viewer for manual printing...")
-    if sys.platform == 'darwin':
-      subprocess.run(['open', pdf_path])
-    else:
-      # Linux - try xdg-open
-      subprocess.run(['xdg-open', pdf_path])
+    fall_back_to_viewer()
+  return False
+
+def print_html_unix(html_str: str, printer_name: str | None = None, pages: str | None = None) -> bool:
+  """
+  Send the HTML document straight to CUPS (--no-pdf), skipping PDF rendering entirely.
+  CUPS' text/html filter lays the document out, so the output follows the print CSS
+  only as far as that filter supports it. pages becomes the page-ranges option.
+  Returns True if lp/lpr accepted the job; False to fall back to rendering a PDF.
+  """
+  lp_cmd = shutil.which('lp') or shutil.which('lpr')
+  if not lp_cmd:
+    print("Neither 'lp' nor 'lpr' found.")
+    return False
+
+  cmd = build_lp_command(lp_cmd, printer_name) + ['-o', 'document-format=text/html']
+  page_slices = parse_page_range(pages) if pages else []
+  if page_slices:
+    page_ranges = [f"{int(start) + 1}-{end}" for start, end in (spec.split(':') for spec in page_slices)]
+    cmd += ['-o', 'page-ranges=' + ','.join(page_ranges)]
+  print("Running:", " ".join(cmd), "< (HTML document)")
+
+  if debug_print_md:
+    print("unix - would execute HTML print command")
+    return True
+  try:
+    run_lp_command(cmd, html_str.encode('utf-8'))
+    return True
+  except Exception as e:
+    print(f"HTML print command failed: {e}")
+    return False
+
+def get_spooler_job_ids() -> set[int] | None:
+  """
+  Job ids currently queued on the default Windows printer (where the shell print verbs send jobs).
+  Returns None if the queue can't be read (not Windows, or pywin32 missing).
+  """
+  if not sys.platform.startswith('win') or not load_optional('pywin32'):
+    return None
+  try:
+    handle = win32print.OpenPrinter(win32print.GetDefaultPrinter())
+    try:
+      return {job['JobId'] for job in win32print.EnumJobs(handle, 0, 999, 1)}
+    finally:
+      win32print.ClosePrinter(handle)
+  except Exception:
+    return None
+
+def wait_for_spooled_jobs(known_jobs: set[int] | None, expected: int, timeout: float) -> None:
+  """
+  Wait until `expected` jobs not in known_jobs show up in the spooler, at most timeout seconds.
+  The print application reads the PDF before it spools the job, so the file can be removed then.
+  Without a readable queue (known_jobs is None) this just waits the full timeout (at least 1s).
+  """
+  if known_jobs is None:
+    time.sleep(max(1.0, timeout))
+    return
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    current_jobs = get_spooler_job_ids()
+    if current_jobs is None or len(current_jobs - known_jobs) >= expected:
+      return
+    time.sleep(0.1)
+  print(f"Print job not seen in the spooler after {timeout:g}s, cleaning up anyway")
+
+# winspool EnumPrinters flags (winspool.h)
+PRINTER_ENUM_LOCAL = 0x2
+PRINTER_ENUM_CONNECTIONS = 0x4
+
+def enum_printers_winspool() -> list[str]:
+  """
+  List printers by calling winspool's EnumPrintersW through ctypes.
+  Same call pywin32 makes, so printers can be listed without pywin32 and without a subprocess.
+  """
+  import ctypes
+  from ctypes import wintypes
+
+  class PrinterInfo4(ctypes.Structure):
+    # PRINTER_INFO_4: names only, read from the registry without querying each printer
+    _fields_ = [
+      ('pPrinterName', wintypes.LPWSTR),
+      ('pServerName', wintypes.LPWSTR),
+      ('Attributes', wintypes.DWORD),
+    ]
+
+  enum_printers = ctypes.WinDLL('winspool.drv', use_last_error=True).EnumPrintersW
+  flags = PRINTER_ENUM_LOCAL | PRINTER_ENUM_CONNECTIONS
+  needed = wintypes.DWORD(0)
+  returned = wintypes.DWORD(0)
+  # First call only reports the buffer size needed
+  enum_printers(flags, None, 4, None, 0, ctypes.byref(needed), ctypes.byref(returned))
+  if needed.value == 0:
+    return []
+  buffer = ctypes.create_string_buffer(needed.value)
+  if not enum_printers(flags, None, 4, buffer, needed, ctypes.byref(needed), ctypes.byref(returned)):
+    raise ctypes.WinError(ctypes.get_last_error())
+  infos = ctypes.cast(buffer, ctypes.POINTER(PrinterInfo4))
+  return [infos[i].pPrinterName for i in range(returned.value)]
 
 def get_available_printers() -> list[str]:
   """Get list of available printers on the system."""
   printers = []
 
   if sys.platform.startswith('win'):
-    # Windows: use win32print if available, otherwise enumerate via wmic
-    if _have_pywin32:
+    # Windows: use win32print if available, otherwise EnumPrintersW via ctypes, then PowerShell (CIM)
+    if load_optional('pywin32'):
       try:
         # EnumPrinters returns a list of tuples: (Flags, Description, Name, Comment)
         printer_info = win32print.EnumPrinters(win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS)
-        printers = [info[2] for info in printer_info]  # info[2] is the printer name
+        return [info[2] for info in printer_info]  # info[2] is the printer name
       except Exception as e:
         print(f"Warning: Failed to enumerate printers via pywin32: {e}", file=sys.stderr)
-        # Fallback to wmic
-        try:
-          result = subprocess.run(['wmic', 'printer', 'get', 'name'], capture_output=True, text=True, shell=True)
-          if result.returncode == 0:
-            lines = result.stdout.strip().split('\n')
-            printers = [line.strip() for line in lines[1:] if line.strip()]
-        except Exception as e2:
-          print(f"Warning: Failed to enumerate printers via wmic: {e2}", file=sys.stderr)
-    else:
-      # No pywin32, try wmic
-      try:
-        result = subprocess.run(['wmic', 'printer', 'get', 'name'], capture_output=True, text=True, shell=True)
-        if result.returncode == 0:
-          lines = result.stdout.strip().split('\n')
-          printers = [line.strip() for line in lines[1:] if line.strip()]
-      except Exception as e:
-        print(f"Warning: Failed to enumerate printers: {e}", file=sys.stderr)
+    try:
+      return enum_printers_winspool()
+    except Exception as e:
+      print(f"Warning: Failed to enumerate printers via winspool: {e}", file=sys.stderr)
+    # Last resort: wmic is deprecated and slow, CIM through PowerShell replaces it
+    try:
+      cim_query = 'Get-CimInstance -ClassName Win32_Printer | Select-Object -ExpandProperty Name'
+      result = subprocess.run(
+        ['powershell', '-NoProfile', '-NonInteractive', '-Command', cim_query],
+        capture_output=True,
+        text=True
+      )
+      if result.returncode == 0:
+        printers = [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    except Exception as e:
+      print(f"Warning: Failed to enumerate printers: {e}", file=sys.stderr)
   else:
     # Unix/Linux/macOS: use lpstat
     try:
@@ -289,98 +808,110 @@ def get_available_printers() -> list[str]:
 
   return printers
 
+# lp's confirmation line, e.g. "request id is Office-123 (1 file(s))"
+LP_REQUEST_ID_RE = re.compile(r'request id is (\S+)')
+
+# One page-range element: '3' or '1-5' (whitespace allowed around numbers and the dash)
+PAGE_RANGE_RE = re.compile(r'\s*(\d+)\s*(?:-\s*(\d+))?\s*')
+
 def parse_page_range(page_spec: str) -> list[str]:
   """
   Convert user-friendly page specification to pypdf PageRange slice notation.
   User enters pages 1-indexed: '3' or '1-5' or '1-3,5,7-9'
   Returns list of slice strings (0-indexed): ['2:3'] or ['0:5'] or ['0:3','4:5','6:9']
+  Consecutive ranges that touch or overlap are merged, so each slice is one pass over the PDF.
   Examples:
     '3' -> ['2:3'] (page 3 becomes slice 2:3)
     '1-5' -> ['0:5'] (pages 1-5 become slice 0:5)
     '1-3,5,7-9' -> ['0:3','4:5','6:9'] (multiple ranges)
+    '1-3,4,5-6' -> ['0:6'] (adjacent ranges merged)
   """
   if not page_spec or not page_spec.strip():
     return []
-  
-  try:
-    slices = []
-    parts = page_spec.split(',')
-    
-    for part in parts:
-      part = part.strip()
-      if not part:
-        continue
-      
-      if '-' in part:
-        # Range like '1-5' -> slice '0:5'
-        start_str, end_str = part.split('-', 1)
-        start = int(start_str.strip()) - 1  # Convert to 0-indexed
-        end = int(end_str.strip())  # End is exclusive in slice notation
-        slices.append(f"{start}:{end}")
-      else:
-        # Single page like '3' -> slice '2:3'
-        page_num = int(part) - 1  # Convert to 0-indexed
-        slices.append(f"{page_num}:{page_num + 1}")
-    
-    print(f"Parsed page range '{page_spec}' -> slices {slices}")
-    return slices
-  except (ValueError, AttributeError) as e:
-    print(f"Warning: Invalid page range '{page_spec}' ({e}). Printing all pages.")
-    return []
 
-def filter_pdf_pages(input_pdf: str, output_pdf: str, page_slices: list[str]) -> bool:
+  ranges: list[list[int]] = []
+  for part in page_spec.split(','):
+    if not part.strip():
+      continue
+    match = PAGE_RANGE_RE.fullmatch(part)
+    if not match:
+      print(f"Warning: Invalid page range '{page_spec}' ('{part.strip()}'). Printing all pages.")
+      return []
+    start = int(match.group(1)) - 1  # Convert to 0-indexed
+    end = int(match.group(2) or match.group(1))  # End is exclusive in slice notation
+    if ranges and ranges[-1][0] <= start <= ranges[-1][1]:
+      ranges[-1][1] = max(ranges[-1][1], end)
+    else:
+      ranges.append([start, end])
+
+  slices = [f"{start}:{end}" for start, end in ranges]
+  print(f"Parsed page range '{page_spec}' -> slices {slices}")
+  return slices
+
+def filter_pdf_pages(input_pdf: str | bytes, page_slices: list[str]) -> bytes | None:
   """
-  Create filtered PDF containing only specified pages using pypdf PageRange.
+  Create filtered PDF containing only specified pages.
+  The slices are expanded (and clipped to the page count) with pypdf PageRange first, then
+  every page is added in one pass instead of one writer.append per slice.
+  input_pdf: path to the PDF, or the PDF bytes
   page_slices: list of slice notation strings like ['0:5','6:9']
-  Returns True if successful, False otherwise.
+  Returns the filtered PDF bytes if successful, None otherwise.
   """
-  if (not _have_pypdf) or (not PdfReader) or (not PdfWriter) or (not PageRange):
-    if not ensure_pypdf_available():
-      print("Warning: pypdf not available. Cannot filter pages. Install with: pip install pypdf")
-      return False
-  
+  if not load_optional('pypdf'):
+    raise RuntimeError("pypdf is required to print a page range. Run: printMD.py --install-deps")
+
   try:
-    reader = PdfReader(input_pdf)
+    reader = PdfReader(io.BytesIO(input_pdf) if isinstance(input_pdf, bytes) else input_pdf)
     writer = PdfWriter()
     
     total_pages = len(reader.pages)
     print(f"Total pages in PDF: {total_pages}")
     
-    # Append each page range slice
+    page_indices: list[int] = []
     for slice_spec in page_slices:
       print(f"  Extracting pages: PageRange('{slice_spec}')")
-      writer.append(reader, pages=PageRange(slice_spec))
+      page_indices.extend(range(*PageRange(slice_spec).indices(total_pages)))
+
+    for index in page_indices:
+      writer.add_page(reader.pages[index])
     
     if len(writer.pages) == 0:
       print("Error: No valid pages to print")
-      return False
+      return None
     
-    # Write the filtered PDF
-    with open(output_pdf, 'wb') as output_file:
-      writer.write(output_file)
+    # Keep the filtered PDF in memory; it is handed straight to the print backend
+    output = io.BytesIO()
+    writer.write(output)
     
-    print(f"Created filtered PDF with {len(writer.pages)} page(s): {output_pdf}")
-    return True
+    print(f"Created filtered PDF with {len(writer.pages)} page(s)")
+    return output.getvalue()
   except Exception as e:
     print(f"Error filtering PDF pages: {e}")
-    return False
+    return None
 
-def ensure_pypdf_available() -> bool:
-  global _have_pypdf, PdfReader, PdfWriter, PageRange
-  if _have_pypdf and PdfReader and PdfWriter and PageRange:
-    return True
+def install_dependencies() -> int:
+  """
+  pip install the Python packages printMD uses (--install-deps), then exit.
+  Done on request only, never in the middle of a print job.
+  """
+  packages = PYTHON_PACKAGES + (['pywin32'] if sys.platform.startswith('win') else [])
+  cmd = [sys.executable, '-m', 'pip', 'install', *packages]
+  print("Running:", " ".join(cmd))
   try:
-    print("Installing required dependency 'pypdf' for page range support...")
-    subprocess.run([sys.executable, '-m', 'pip', 'install', '--quiet', 'pypdf'], check=True)
-    module = importlib.import_module('pypdf')
-    PdfReader = module.PdfReader
-    PdfWriter = module.PdfWriter
-    PageRange = module.PageRange
-    _have_pypdf = True
-    print("'pypdf' installed successfully.")
-    return True
-  except Exception as e:
-    print(f"Warning: Unable to install 'pypdf'. Page range filtering unavailable. ({e})")
+    subprocess.run(cmd, check=True)
+  except (OSError, subprocess.CalledProcessError) as e:
+    print(f"ERROR: Unable to install Python packages ({e})")
+    print("Try again with --user or --break-system-packages, or in a virtual environment:")
+    print(f"  {sys.executable} -m pip install --user {' '.join(packages)}")
+    return 1
+  print("Python packages installed.")
+  return 0
+
+def is_regular_file(path: Path) -> bool:
+  """Check that path is an existing regular file with a single stat() call (exists() + is_file() makes two)."""
+  try:
+    return stat.S_ISREG(path.stat().st_mode)
+  except OSError:
     return False
 
 def open_html_in_browser(html_path: str) -> None:
@@ -396,31 +927,154 @@ def open_html_in_browser(html_path: str) -> None:
   except Exception as e:
     print("Failed to open browser:", e)
 
-def main() -> int:
-  global debug_print_md
+def build_parser() -> argparse.ArgumentParser:
   parser = argparse.ArgumentParser(description="Print Markdown to a physical printer (via HTML preview -> PDF)")
-  parser.add_argument('mdfile', nargs='?', help="Path to a markdown file")
+  parser.add_argument('mdfile', nargs='*', help="Path to a markdown file (several are rendered in parallel)")
   parser.add_argument('--html', help="Path to pre-rendered HTML file (alternative to mdfile)")
-  parser.add_argument('--pdf', help="Path where PDF should be saved")
+  parser.add_argument('--pdf', help="Path where PDF should be saved (directory for several mdfiles)")
   parser.add_argument('--printer', '-p', help="Printer name (optional)", default=None)
   parser.add_argument('--pages', help="Page range: single page '3' or range '1-5,7,9-12' (optional)", default=None)
   parser.add_argument('--list-printers', action='store_true', help="List available printers and exit")
   parser.add_argument('--base-url', help="Base directory for resolving relative resources like images (optional)", default=None)
-  parser.add_argument('--wait-seconds', '-w', type=float, default=3.0, help="Seconds to wait after issuing print command before cleanup")
-  args = parser.parse_args()
+  parser.add_argument('--wait-seconds', '-w', type=float, default=3.0, help="Max seconds to wait for the job to spool before cleanup")
+  parser.add_argument('--highlight', action='store_true', help="Syntax highlight code blocks with Pygments")
+  parser.add_argument('--md-ext', action='append', type=md_ext_option, help="Markdown extension change, e.g. add:toc")
+  parser.add_argument('--print-link-urls', action='store_true', help="Print each link's URL after its text in the PDF")
+  parser.add_argument('--backend', choices=PDF_BACKENDS, default='weasyprint', help="HTML to PDF renderer (default: weasyprint)")
+  parser.add_argument('--no-pdf', action='store_true', help="Linux/macOS: send the HTML to CUPS instead of a PDF")
+  parser.add_argument('--no-cache', action='store_true', help="Always re-render instead of reusing a cached PDF of the same document")
+  parser.add_argument('--warmup', action='store_true', help="Prime font caches at --serve/batch worker startup")
+  parser.add_argument('--install-deps', action='store_true', help="Install the Python packages printMD uses and exit")
+  parser.add_argument('--serve', action='store_true', help="Stay running and read JSON print jobs from stdin, one per line")
+  return parser
 
-  # Handle list-printers command
-  if args.list_printers:
-    printers = get_available_printers()
-    for printer in printers:
-      print(printer)
-    return 0
+# Options that configure the --serve worker itself rather than a print job
+SERVE_ONLY_OPTIONS = ('serve', 'warmup', 'install_deps')
+
+def run_serve(args: argparse.Namespace) -> int:
+  """
+  Long-lived worker mode used by the VS Code extension.
+
+  Reads one JSON job per line from stdin and answers with one JSON status line on stdout.
+  Job keys are the option names with underscores (mdfile, html, pdf, printer, pages, base_url, ...);
+  options given next to --serve (e.g. --backend) are the defaults for every job.
+  {"list_printers": true} returns the printer list instead of printing.
+  Response: {"id": <job id>, "code": <exit code>, "output": <captured messages>[, "printers": [...]]}
+
+  Python startup and the markdown/WeasyPrint imports are paid once instead of per print.
+  """
+  # Keep the real stdout for responses and point fd 1 at stderr so messages from
+  # print() and child processes (lp, etc.) can't corrupt the protocol stream
+  protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+  sys.stdout.flush()
+  os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+  defaults = {key: value for key, value in vars(args).items() if key not in SERVE_ONLY_OPTIONS}
+  if args.warmup:
+    warm_up_pdf_backend(args.backend)
+
+  # The extension writes UTF-8; without this Windows decodes the pipe with the ANSI code page
+  sys.stdin.reconfigure(encoding='utf-8')
+  for line in sys.stdin:
+    line = line.strip()
+    if not line:
+      continue
+    response: dict = {'id': None, 'code': 1}
+    output = io.StringIO()
+    try:
+      job = json.loads(line)
+      response['id'] = job.pop('id', None)
+      unknown = [key for key in job if key not in defaults]
+      if unknown:
+        raise ValueError(f"Unknown job option(s): {', '.join(unknown)}")
+      args = argparse.Namespace(**{**defaults, **job})
+      forget_missing_optional()
+      with contextlib.redirect_stdout(output):
+        if args.list_printers:
+          response['printers'] = get_available_printers()
+          response['code'] = 0
+        else:
+          response['code'] = run_documents(args)
+    except Exception as e:
+      response['error'] = str(e)
+    response['output'] = output.getvalue()
+    sys.stderr.write(response['output'])
+    protocol.write(json.dumps(response) + '\n')
+  return 0
 
+def render_with_cache(html_doc: str, out_pdf: str | None, use_cache: bool = True, **render_options) -> bytes | None:
+  """
+  render_pdf, reusing the PDF rendered last time when the document is unchanged.
+  render_options are passed to render_pdf; writes to out_pdf, or returns the PDF bytes when out_pdf is None.
+  """
+  cache_key = pdf_cache_key(html_doc, **render_options) if use_cache else None
+  cached_pdf = find_cached_pdf(cache_key) if cache_key else None
+  if cached_pdf:
+    try:
+      cached_data = cached_pdf.read_bytes()
+    except OSError:
+      # Evicted by another worker after the lookup; render it again
+      cached_data = None
+    if cached_data is not None:
+      print("Using cached PDF:", cached_pdf)
+      if out_pdf is None:
+        return cached_data
+      Path(out_pdf).write_bytes(cached_data)
+      return None
+
+  print(f"Rendering PDF (Letter) using {render_options.get('backend', 'weasyprint')}...")
+  pdf_data = render_pdf(html_doc, out_pdf, **render_options)
+  if cache_key:
+    store_cached_pdf(cache_key, pdf_data if pdf_data is not None else out_pdf)
+  return pdf_data
+
+def send_to_printer(
+  pdf_path: str | None,
+  printer_name: str | None,
+  pages: str | None,
+  get_work_dir,
+  pdf_data: bytes | None = None,
+  pdf_name: str = 'document.pdf'
+) -> bool:
+  """
+  Apply the page range and hand the PDF (the file at pdf_path, or pdf_data) to the platform print method.
+  pdf_path is None when the PDF only exists in memory. If a print method needs it as a file, it is
+  written to get_work_dir() / pdf_name; get_work_dir() is not called otherwise.
+  Returns True if there is no file to wait on: the spooler already has the job, or nothing was printed.
+  """
+  print("Sending to printer...")
+  print(f"Platform: {sys.platform}")
+  
+  # Parse page range if specified
+  page_slices = parse_page_range(pages) if pages else []
+  
+  # If page filtering is requested, create a filtered PDF
+  if page_slices:
+    filtered_data = filter_pdf_pages(pdf_data if pdf_data is not None else pdf_path, page_slices)
+    if filtered_data is not None:
+      # Printed from memory; a file is only written if the print backend needs one
+      pdf_data = filtered_data
+      pdf_name = Path(pdf_path or pdf_name).stem + "_filtered.pdf"
+      pdf_path = None
+    else:
+      print("Warning: Page filtering failed, printing entire document")
+
+  def get_pdf_path() -> str:
+    return pdf_path or str(get_work_dir() / pdf_name)
+
+  if sys.platform.startswith('win'):
+    print("Using Windows print method...")
+    return print_pdf_windows(get_pdf_path(), printer_name, pdf_data=pdf_data)
+  print("Using Unix/macOS print method...")
+  return print_pdf_unix(pdf_path, printer_name, pdf_data=pdf_data, get_pdf_path=get_pdf_path)
+
+def run_print_job(args: argparse.Namespace) -> int:
+  """Render and print (or save) one document described by parsed command line options."""
   # Determine if we're using pre-rendered HTML or markdown
+  print_css_external = False
   if args.html:
     # Use pre-rendered HTML from VS Code
     html_input_path = Path(args.html).expanduser().resolve()
-    if not html_input_path.exists() or not html_input_path.is_file():
+    if not is_regular_file(html_input_path):
       print("ERROR: HTML file not found:", html_input_path)
       return 2
     html_doc = html_input_path.read_text(encoding='utf-8')
@@ -428,11 +1082,25 @@ def main() -> int:
   elif args.mdfile:
     # Original markdown processing
     md_path = Path(args.mdfile).expanduser().resolve()
-    if not md_path.exists() or not md_path.is_file():
+    if not is_regular_file(md_path):
       print("ERROR: markdown file not found:", md_path)
       return 2
     md_text = md_path.read_text(encoding='utf-8')
-    html_doc = md_to_html(md_text, title=md_path.name)
+    # WeasyPrint gets the print stylesheet pre-parsed, so only inline it when it can't be used
+    print_css_external = args.backend == 'weasyprint' and not args.no_pdf and load_optional('weasyprint')
+    if args.highlight and not load_optional('pygments'):
+      print("Warning: Pygments not available, code blocks will not be highlighted. Install with: pip install pygments")
+    try:
+      html_doc = md_to_html(
+        md_text,
+        title=md_path.name,
+        inline_css=not print_css_external,
+        highlight=args.highlight,
+        md_ext=args.md_ext
+      )
+    except ValueError as e:
+      print("ERROR:", e)
+      return 2
     title = md_path.stem
   else:
     print("ERROR: Either mdfile or --html must be provided")
@@ -441,80 +1109,265 @@ def main() -> int:
   # Determine base_url for resolving relative resources (images, etc.)
   base_url = args.base_url
   if not base_url and args.html:
-    base_url = str(Path(args.html).expanduser().resolve().parent)
+    base_url = str(html_input_path.parent)
   elif not base_url and args.mdfile:
-    base_url = str(Path(args.mdfile).expanduser().resolve().parent)
+    base_url = str(md_path.parent)
+
+  if args.no_pdf:
+    if sys.platform.startswith('win') or args.pdf:
+      print("Warning: --no-pdf only applies to printing on Linux/macOS, rendering a PDF instead")
+    else:
+      link_css = PRINT_CSS_LINK_URLS if args.print_link_urls else ''
+      if print_html_unix(add_html_head(html_doc, base_url, link_css), args.printer, args.pages):
+        print("Print command issued.")
+        return 0
+      print("Falling back to rendering a PDF.")
+
+  tmpdir: Path | None = None
+  keep_tmpdir = False
+
+  def get_tmpdir() -> Path:
+    # Created on first use: printing to a --pdf path that renders fine never needs one
+    nonlocal tmpdir
+    if tmpdir is None:
+      tmpdir = Path(tempfile.mkdtemp(prefix="printmd_"))
+    return tmpdir
+
+  def save_html_fallback(html_str: str) -> None:
+    # The browser loads the file after we return, so the temp dir is kept
+    nonlocal keep_tmpdir
+    html_path = str(get_tmpdir() / (title + ".html"))
+    Path(html_path).write_text(html_str, encoding='utf-8')
+    open_html_in_browser(html_path)
+    keep_tmpdir = True
 
-  tmpdir = Path(tempfile.mkdtemp(prefix="printmd_"))
   try:
-    # Use provided PDF path or create temp one
+    # On Unix the PDF can go straight to lp's stdin; only write it when the user asked for a file
+    # (or Windows' print verbs need one). Without a path, render_with_cache returns the bytes.
+    pdf_data = None
     if args.pdf:
       pdf_path = args.pdf
-      cleanup_pdf = False
+    elif sys.platform.startswith('win'):
+      pdf_path = str(get_tmpdir() / (title + ".pdf"))
     else:
-      pdf_path = str(tmpdir / (title + ".pdf"))
-      cleanup_pdf = True
+      pdf_path = None
 
-    html_path = str(tmpdir / (title + ".html"))
-
-    if _have_weasy:
+    if have_pdf_backend(args.backend):
       try:
-        print("Rendering PDF (Letter) using WeasyPrint...")
-        render_pdf(html_doc, pdf_path, base_url=base_url)
-        print("PDF saved to:", pdf_path)
+        pdf_data = render_with_cache(
+          html_doc,
+          pdf_path,
+          use_cache=not args.no_cache,
+          base_url=base_url,
+          print_link_urls=args.print_link_urls,
+          include_print_css=print_css_external,
+          backend=args.backend
+        )
+        if pdf_data is not None:
+          print(f"PDF ready in memory ({len(pdf_data)} bytes)")
+        else:
+          print("PDF saved to:", pdf_path)
       except Exception as e:
-        print("WeasyPrint rendering failed:", e)
+        print(f"{args.backend} rendering failed:", e)
         print("Falling back to saving HTML for manual printing.")
-        Path(html_path).write_text(html_doc, encoding='utf-8')
-        open_html_in_browser(html_path)
+        if print_css_external:
+          html_doc = md_to_html(md_text, title=md_path.name, highlight=args.highlight, md_ext=args.md_ext)
+        save_html_fallback(html_doc)
         return 0
     else:
       # Save HTML fallback
-      print("WeasyPrint not available. Saving HTML preview for manual printing.")
-      Path(html_path).write_text(html_doc, encoding='utf-8')
-      open_html_in_browser(html_path)
+      print(f"PDF backend '{args.backend}' not available. Saving HTML preview for manual printing.")
+      save_html_fallback(html_doc)
       return 0
 
     # Send to printer
     try:
-      print("Sending to printer...")
-      print(f"Platform: {sys.platform}")
-      
-      # Parse page range if specified
-      page_slices = parse_page_range(args.pages) if args.pages else []
-      
-      # If page filtering is requested, create a filtered PDF
-      pdf_to_print = pdf_path
-      if page_slices:
-        filtered_pdf = str(tmpdir / (title + "_filtered.pdf"))
-        if filter_pdf_pages(pdf_path, filtered_pdf, page_slices):
-          pdf_to_print = filtered_pdf
-        else:
-          print("Warning: Page filtering failed, printing entire document")
-          page_slices = []
-      
-      if sys.platform.startswith('win'):
-        print("Using Windows print method...")
-        print_pdf_windows(pdf_to_print, args.printer)
-      else:
-        print("Using Unix/macOS print method...")
-        print_pdf_unix(pdf_to_print, args.printer)
-      # Give the system some time to queue the job before we remove the file
-      time.sleep(max(1.0, float(args.wait_seconds)))
+      known_jobs = get_spooler_job_ids()
+      released = send_to_printer(
+        pdf_path,
+        args.printer,
+        args.pages,
+        get_tmpdir,
+        pdf_data=pdf_data,
+        pdf_name=title + ".pdf"
+      )
+      if not released:
+        # The print application still needs the file; keep it until the job is spooled
+        wait_for_spooled_jobs(known_jobs, 1, float(args.wait_seconds))
       print("Print command issued.")
       return 0
     except Exception as e:
       print("Error sending to printer:", e)
-      print("Saved PDF at:", pdf_path)
+      if pdf_path and os.path.exists(pdf_path):
+        print("Saved PDF at:", pdf_path)
       return 3
   finally:
-    # Cleanup: try to remove temp dir (but not custom PDF path)
+    # Cleanup: try to remove temp dir (never holds a custom --pdf path)
     try:
-      time.sleep(0.5)
-      if cleanup_pdf:
+      if tmpdir is not None and not keep_tmpdir:
         shutil.rmtree(tmpdir, ignore_errors=True)
     except Exception:
       pass
 
+def init_render_worker(backend: str, warmup: bool = False) -> None:
+  """ProcessPoolExecutor initializer: import (and optionally warm up) the PDF backend once per worker process."""
+  if have_pdf_backend(backend) and warmup:
+    warm_up_pdf_backend(backend)
+
+def render_batch_document(md_file: str, out_pdf: str, options: dict) -> str | None:
+  """
+  Render one markdown file of a batch to out_pdf (runs in a worker process).
+  options: highlight, md_ext, print_link_urls, backend, base_url, no_cache from the command line
+  Returns an error message, or None on success.
+  """
+  try:
+    md_path = Path(md_file).expanduser().resolve()
+    if not is_regular_file(md_path):
+      return f"markdown file not found: {md_path}"
+    print_css_external = options['backend'] == 'weasyprint'
+    md_text = md_path.read_text(encoding='utf-8')
+    html_doc = md_to_html(
+      md_text,
+      title=md_path.name,
+      inline_css=not print_css_external,
+      highlight=options['highlight'],
+      md_ext=options['md_ext']
+    )
+    render_with_cache(
+      html_doc,
+      out_pdf,
+      use_cache=not options['no_cache'],
+      base_url=options['base_url'] or str(md_path.parent),
+      print_link_urls=options['print_link_urls'],
+      include_print_css=print_css_external,
+      backend=options['backend']
+    )
+    return None
+  except Exception as e:
+    return str(e)
+
+def run_batch(args: argparse.Namespace) -> int:
+  """
+  Print several markdown files. Layout is CPU-bound and documents share no state, so they are
+  rendered in parallel worker processes and each PDF is printed as soon as it is ready.
+  With --pdf, it names the directory the PDFs are saved to.
+  """
+  md_files = args.mdfile
+  if not have_pdf_backend(args.backend):
+    print(f"ERROR: PDF backend '{args.backend}' not available. Printing several files requires it.")
+    return 3
+  if args.highlight and not load_optional('pygments'):
+    print("Warning: Pygments not available, code blocks will not be highlighted. Install with: pip install pygments")
+  if args.no_pdf:
+    print("Warning: --no-pdf is not supported for several files, rendering PDFs instead")
+
+  options = {
+    'highlight': args.highlight,
+    'md_ext': args.md_ext,
+    'print_link_urls': args.print_link_urls,
+    'backend': args.backend,
+    'base_url': args.base_url,
+    'no_cache': args.no_cache,
+  }
+  tmpdir: Path | None = None
+
+  def get_tmpdir() -> Path:
+    # Only needed for PDFs that are not saved to a --pdf directory, or for filtered pages
+    nonlocal tmpdir
+    if tmpdir is None:
+      tmpdir = Path(tempfile.mkdtemp(prefix="printmd_"))
+    return tmpdir
+
+  failures = 0
+  waiting_on_files = 0
+  try:
+    if args.pdf:
+      out_dir = Path(args.pdf).expanduser()
+      out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = {}
+    max_workers = min(len(md_files), os.cpu_count() or 1)
+    print(f"Rendering {len(md_files)} file(s) with {max_workers} worker process(es)...")
+    known_jobs = get_spooler_job_ids()
+    worker_args = (args.backend, args.warmup)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_render_worker, initargs=worker_args) as pool:
+      stems = [Path(md_file).stem for md_file in md_files]
+      for index, (md_file, stem) in enumerate(zip(md_files, stems)):
+        if not args.pdf:
+          out_pdf = str(get_tmpdir() / f"{index:03d}_{stem}.pdf")
+        elif stems.count(stem) > 1:
+          # Same file name in different folders (d1/README.md, d2/README.md) would overwrite each other
+          out_pdf = str(out_dir / f"{index:03d}_{stem}.pdf")
+        else:
+          out_pdf = str(out_dir / f"{stem}.pdf")
+        jobs[pool.submit(render_batch_document, md_file, out_pdf, options)] = (md_file, out_pdf)
+
+      for future in as_completed(jobs):
+        md_file, out_pdf = jobs[future]
+        try:
+          error = future.result()
+        except Exception as e:
+          error = str(e)
+        if error:
+          print(f"ERROR: {md_file}: {error}")
+          failures += 1
+          continue
+        print("PDF saved to:", out_pdf)
+        try:
+          if not send_to_printer(out_pdf, args.printer, args.pages, get_tmpdir):
+            waiting_on_files += 1
+        except Exception as e:
+          print(f"Error sending {md_file} to printer:", e)
+          failures += 1
+
+    if waiting_on_files:
+      # Keep the files until the print application has spooled them
+      wait_for_spooled_jobs(known_jobs, waiting_on_files, float(args.wait_seconds))
+    print(f"Print commands issued for {len(md_files) - failures} of {len(md_files)} file(s).")
+    return 3 if failures else 0
+  finally:
+    if tmpdir is not None:
+      shutil.rmtree(tmpdir, ignore_errors=True)
+
+def run_documents(args: argparse.Namespace) -> int:
+  """Print the documents named by the options: run_batch for several markdown files, else run_print_job."""
+  if isinstance(args.mdfile, str):
+    args.mdfile = [args.mdfile]
+  if args.mdfile and len(args.mdfile) > 1 and not args.html:
+    return run_batch(args)
+  args.mdfile = args.mdfile[0] if args.mdfile else None
+  return run_print_job(args)
+
+def main() -> int:
+  parser = build_parser()
+  args = parser.parse_args()
+
+  if args.install_deps:
+    return install_dependencies()
+
+  if markdown is None:
+    # In --serve mode stdout is the protocol stream, so the extension only sees stderr
+    print(
+      "ERROR: Missing Python package 'markdown'. Install with: printMD.py --install-deps",
+      file=sys.stderr if args.serve else sys.stdout
+    )
+    return 2
+
+  if args.serve:
+    return run_serve(args)
+
+  # Handle list-printers command
+  if args.list_printers:
+    printers = get_available_printers()
+    for printer in printers:
+      print(printer)
+    return 0
+
+  try:
+    return run_documents(args)
+  except RuntimeError as e:
+    # Missing optional dependencies (e.g. pypdf for --pages) end up here
+    print("ERROR:", e)
+    return 3
+
 if __name__ == "__main__":
   sys.exit(main())
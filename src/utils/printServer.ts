@@ -0,0 +1,191 @@
+// printServer
+// Keep one printMD.py process running in --serve mode and send it print jobs as JSON lines.
+
+import { spawn, ChildProcessWithoutNullStreams } from 'child_process';
+
+// Job options mirror the printMD.py command line options (underscored).
+export interface PrintJob {
+  html?: string;
+  pdf?: string;
+  base_url?: string;
+  printer?: string;
+  pages?: string;
+  list_printers?: boolean;
+}
+
+export interface PrintJobResult {
+  id: number | null;
+  code: number;
+  output?: string;
+  error?: string;
+  printers?: string[];
+}
+
+interface PendingJob {
+  resolve: (result: PrintJobResult) => void;
+  request: string;
+}
+
+// The worker handles one job at a time; if the current job takes longer than this it is
+// assumed hung, the worker is restarted and the jobs queued behind it are sent again.
+const JOB_TIMEOUT_MS = 3 * 60 * 1000;
+
+let serverProc: ChildProcessWithoutNullStreams | undefined;
+let serverCommand: { pythonCmd: string; pythonEngine: string } | undefined;
+let stdoutBuffer = '';
+// Last stderr text, shown with the exit code if the worker dies (e.g. a missing package at startup)
+let lastServerError = '';
+let nextJobId = 1;
+let jobTimer: NodeJS.Timeout | undefined;
+const pendingJobs = new Map<number, PendingJob>();
+
+// Resolve every waiting job with a failure, used when the worker exits.
+function failPendingJobs(message: string): void {
+  pendingJobs.forEach((job, id) => job.resolve({ id: id, code: -1, error: message }));
+  pendingJobs.clear();
+  armJobTimer();
+}
+
+// Time the job the worker is on now (the oldest pending one).
+function armJobTimer(): void {
+  if (jobTimer) {
+    clearTimeout(jobTimer);
+    jobTimer = undefined;
+  }
+  const current = pendingJobs.keys().next();
+  if (current.done) {
+    return;
+  }
+  const id = current.value;
+  jobTimer = setTimeout(() => handleJobTimeout(id), JOB_TIMEOUT_MS);
+}
+
+// Fail the hung job, replace the worker and resend the jobs that were waiting behind it.
+function handleJobTimeout(id: number): void {
+  jobTimer = undefined;
+  const job = pendingJobs.get(id);
+  if (!job) {
+    return;
+  }
+  pendingJobs.delete(id);
+  job.resolve({ id: id, code: -1, error: `Print job timed out after ${JOB_TIMEOUT_MS / 1000}s` });
+  console.error(`[PrintMD] Print job ${id} timed out, restarting print server`);
+
+  killPrintServer();
+  if (pendingJobs.size > 0 && serverCommand) {
+    const proc = startPrintServer(serverCommand.pythonCmd, serverCommand.pythonEngine);
+    pendingJobs.forEach(pending => proc.stdin.write(pending.request));
+  }
+  armJobTimer();
+}
+
+// Handle one JSON status line written by the worker.
+function handleResponseLine(line: string): void {
+  if (!line.trim()) {
+    return;
+  }
+  try {
+    const result: PrintJobResult = JSON.parse(line);
+    const job = result.id !== null ? pendingJobs.get(result.id) : undefined;
+    if (job && result.id !== null) {
+      // Whatever the worker logged so far belonged to this job, not to a later failure
+      lastServerError = '';
+      pendingJobs.delete(result.id);
+      job.resolve(result);
+      armJobTimer();
+    }
+  } catch (err) {
+    console.error('[PrintMD] Invalid response from print server:', line);
+  }
+}
+
+// Start the worker if it is not already running.
+function startPrintServer(pythonCmd: string, pythonEngine: string): ChildProcessWithoutNullStreams {
+  if (serverProc) {
+    return serverProc;
+  }
+
+  const proc = spawn(pythonCmd, [pythonEngine, '--serve', '--warmup']);
+  serverCommand = { pythonCmd: pythonCmd, pythonEngine: pythonEngine };
+  stdoutBuffer = '';
+  lastServerError = '';
+
+  proc.stdout.on('data', (data) => {
+    stdoutBuffer += data.toString();
+    let newline = stdoutBuffer.indexOf('\n');
+    while (newline >= 0) {
+      handleResponseLine(stdoutBuffer.slice(0, newline));
+      stdoutBuffer = stdoutBuffer.slice(newline + 1);
+      newline = stdoutBuffer.indexOf('\n');
+    }
+  });
+
+  proc.stderr.on('data', (data) => {
+    const text = data.toString();
+    console.log(`[PrintMD server] ${text}`);
+    if (text.trim()) {
+      lastServerError = text.trim();
+    }
+  });
+
+  // A worker replaced after a timeout exits later; only the current one fails the queue
+  proc.on('error', (err) => {
+    console.error('[PrintMD] Print server failed to start:', err);
+    if (serverProc === proc) {
+      serverProc = undefined;
+      failPendingJobs(`Print server failed to start: ${err.message}`);
+    }
+  });
+
+  proc.on('exit', (code) => {
+    if (serverProc === proc) {
+      serverProc = undefined;
+      const detail = lastServerError ? `: ${lastServerError}` : '';
+      failPendingJobs(`Print server exited (code ${code})${detail}`);
+    }
+  });
+
+  serverProc = proc;
+  return proc;
+}
+
+/**
+ * Send a job to the print server, starting it on first use.
+ * Resolves with the worker's status once the job has finished, or with an error if it
+ * runs longer than JOB_TIMEOUT_MS (the worker is then restarted).
+ *
+ * @param pythonCmd - Python executable to run the worker with
+ * @param pythonEngine - Path to printMD.py
+ * @param job - Job options for printMD.py
+ */
+export function sendPrintJob(pythonCmd: string, pythonEngine: string, job: PrintJob): Promise<PrintJobResult> {
+  const proc = startPrintServer(pythonCmd, pythonEngine);
+  const id = nextJobId++;
+  const request = JSON.stringify({ id: id, ...job }) + '\n';
+
+  return new Promise<PrintJobResult>(resolve => {
+    pendingJobs.set(id, { resolve: resolve, request: request });
+    if (pendingJobs.size === 1) {
+      armJobTimer();
+    }
+    proc.stdin.write(request);
+  });
+}
+
+// Kill the worker without touching the job queue.
+function killPrintServer(): void {
+  if (serverProc) {
+    const proc = serverProc;
+    serverProc = undefined;
+    proc.stdin.end();
+    proc.kill();
+  }
+}
+
+/**
+ * Stop the print server, if running.
+ */
+export function stopPrintServer(): void {
+  killPrintServer();
+  failPendingJobs('Print server stopped');
+}